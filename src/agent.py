@@ -9,10 +9,13 @@ Uses AzureOpenAIResponsesClient from agent-framework-core.
 import asyncio
 import json
 import logging
+import sys
 import time
 from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Any
 
 from agent_framework import AgentResponseUpdate
 from agent_framework.azure import AzureOpenAIResponsesClient  # type: ignore[attr-defined]
@@ -24,7 +27,19 @@ from src.agentic_retrieval import search_knowledge_base
 from src.client import get_client
 from src.prompts import get_system_prompt
 from src.telemetry import get_tracer
-from src.tools import generate_content, generate_image, init_image_store, pop_pending_images, review_content
+from src.tools import (
+    clear_memo_cache,
+    generate_content,
+    generate_image,
+    init_image_store,
+    pop_pending_images,
+    review_content,
+)
+
+try:  # optional: faster SSE payload encoding
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +68,65 @@ MAX_RETRIES = 2
 RETRY_BASE_DELAY_S = 2.0
 
 
+# Canonical hosted tool names (interned: they are probed on every tool event)
+_WEB_SEARCH = sys.intern("web_search")
+_FILE_SEARCH = sys.intern("file_search")
+_MCP_SEARCH = sys.intern("mcp_search")
+
+# Raw Responses API stream event type → (canonical tool name, phase).
+# Exact keys keep per-event hosted tool detection to a single dict lookup.
+_RAW_EVENT_DISPATCH: dict[str, tuple[str, str]] = {
+    "response.web_search_call.in_progress": (_WEB_SEARCH, "started"),
+    "response.web_search_call.searching": (_WEB_SEARCH, "started"),
+    "response.web_search_call.completed": (_WEB_SEARCH, "completed"),
+    "response.file_search_call.in_progress": (_FILE_SEARCH, "started"),
+    "response.file_search_call.searching": (_FILE_SEARCH, "started"),
+    "response.file_search_call.completed": (_FILE_SEARCH, "completed"),
+    "response.mcp_call.in_progress": (_MCP_SEARCH, "started"),
+    "response.mcp_call_arguments.delta": (_MCP_SEARCH, "started"),
+    "response.mcp_call_arguments.done": (_MCP_SEARCH, "started"),
+    "response.mcp_call.completed": (_MCP_SEARCH, "completed"),
+    "response.mcp_call.failed": (_MCP_SEARCH, "completed"),
+    "response.mcp_list_tools.in_progress": (_MCP_SEARCH, "started"),
+    "response.mcp_list_tools.completed": (_MCP_SEARCH, "completed"),
+    "response.mcp_list_tools.failed": (_MCP_SEARCH, "completed"),
+}
+
+# output_item events carry the hosted tool in item.type rather than the event type
+_OUTPUT_ITEM_PHASES: dict[str, str] = {
+    "response.output_item.added": "started",
+    "response.output_item.done": "completed",
+}
+_HOSTED_ITEM_TYPES: dict[str, str] = {
+    "web_search_call": _WEB_SEARCH,
+    "file_search_call": _FILE_SEARCH,
+    "mcp_call": _MCP_SEARCH,
+    "mcp_list_tools": _MCP_SEARCH,
+}
+
+
+def _mark_once(seen: set[str], key: str) -> bool:
+    """Add ``key`` to ``seen``; return True only the first time it is added."""
+    if key in seen:
+        return False
+    seen.add(key)
+    return True
+
+
+@lru_cache(maxsize=128)
+def _classify_unknown_raw_type(raw_type: str) -> tuple[str, str] | None:
+    """Map a hosted-tool event type missing from _RAW_EVENT_DISPATCH to (tool, phase).
+
+    Safety net for event names added by newer API versions. Cached per type,
+    so the substring scan runs once per distinct unknown type, not per event.
+    """
+    for item_type, tool_name in _HOSTED_ITEM_TYPES.items():
+        if item_type in raw_type:
+            done = raw_type.endswith((".completed", ".done", ".failed"))
+            return tool_name, "completed" if done else "started"
+    return None
+
+
 def _is_retryable_error(exc: Exception) -> bool:
     """Check if an exception is a transient Azure API error worth retrying."""
     msg = str(exc).lower()
@@ -70,6 +144,41 @@ def _is_retryable_error(exc: Exception) -> bool:
     return False
 
 
+def encode_event(event: dict[str, Any]) -> str:
+    """Serialize an SSE JSON payload compactly (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(event, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+
+
+def _fast_iso_now() -> str:
+    """UTC ISO-8601 timestamp at second resolution (all the UI displays)."""
+    return datetime.now(UTC).isoformat(timespec="seconds")
+
+
+def _tool_event_template(tool_name: str, status: str) -> str:
+    """Build a marker-wrapped tool event with a ``%s`` slot for the timestamp."""
+    payload = encode_event({"type": "tool_event", "tool": tool_name, "status": status, "timestamp": "%s"})
+    return f"{TOOL_EVENT_START}{payload}{TOOL_EVENT_END}"
+
+
+# Pre-rendered events for the finite set of known (tool, status) pairs
+_KNOWN_EVENT_TOOLS = (
+    "generate_content",
+    "review_content",
+    "generate_image",
+    "search_knowledge_base",
+    _WEB_SEARCH,
+    _FILE_SEARCH,
+    _MCP_SEARCH,
+)
+_EVENT_TEMPLATES: dict[tuple[str, str], str] = {
+    (tool_name, status): _tool_event_template(tool_name, status)
+    for tool_name in _KNOWN_EVENT_TOOLS
+    for status in ("started", "completed", "error")
+}
+
+
 def create_tool_event(tool_name: str, status: str, message: str | None = None) -> str:
     """Create a JSON-formatted tool event for SSE streaming.
 
@@ -81,15 +190,42 @@ def create_tool_event(tool_name: str, status: str, message: str | None = None) -
     Returns:
         String with tool event markers for frontend parsing.
     """
+    if not message:
+        template = _EVENT_TEMPLATES.get((tool_name, status))
+        if template is not None:
+            return template % _fast_iso_now()
+
     event = {
         "type": "tool_event",
         "tool": tool_name,
         "status": status,
-        "timestamp": datetime.now(UTC).isoformat(),
+        "timestamp": _fast_iso_now(),
     }
     if message:
         event["message"] = message
-    return f"{TOOL_EVENT_START}{json.dumps(event, ensure_ascii=False)}{TOOL_EVENT_END}"
+    return f"{TOOL_EVENT_START}{encode_event(event)}{TOOL_EVENT_END}"
+
+
+# Columnar query layout: field names declared once, one pipe-delimited row per
+# record (schema documented in the system prompt's "Input Format" section).
+# Free-text fields go last so a "|" inside them stays unambiguous.
+_HISTORY_HEADER = "Previous conversation:\nmessages(role|content):\n"
+_QUERY_TEMPLATE = (
+    "Create social media content for the following:\n"
+    "request(platforms|type|lang|topic):\n"
+    "{platforms}|{content_type}|{language}|{message}\n"
+)
+
+
+@lru_cache(maxsize=64)
+def _joined_platforms(platforms: tuple[str, ...]) -> str:
+    """Comma-join a platform selection (few distinct combinations, so cached)."""
+    return ", ".join(platforms)
+
+
+def _one_line(text: str) -> str:
+    """Escape newlines so a free-text field fits on a single columnar row."""
+    return text.replace("\n", "\\n")
 
 
 def _build_query_with_context(
@@ -115,66 +251,38 @@ def _build_query_with_context(
 
     # Add conversation history if available
     if history:
-        history_text = "\n".join(f"{msg['role']}: {msg['content']}" for msg in history[-6:])
-        parts.append(f"Previous conversation:\n{history_text}\n")
+        history_rows = "\n".join(f"{msg['role']}|{_one_line(msg['content'])}" for msg in history[-6:])
+        parts.append(f"{_HISTORY_HEADER}{history_rows}\n")
 
     # Build the current request
-    platform_list = ", ".join(platforms)
     parts.append(
-        f"Create social media content for the following:\n"
-        f"- Topic: {message}\n"
-        f"- Platforms: {platform_list}\n"
-        f"- Content type: {content_type}\n"
-        f"- Language: {language}\n"
+        _QUERY_TEMPLATE.format_map(
+            {
+                "platforms": _joined_platforms(tuple(platforms)),
+                "content_type": content_type,
+                "language": language,
+                "message": _one_line(message),
+            }
+        )
     )
 
     return "\n".join(parts)
 
 
-async def run_agent_stream(
-    message: str,
-    platforms: list[str],
-    content_type: str,
-    language: str,
-    history: list[dict] | None = None,
-    reasoning_effort: str = "medium",
-    reasoning_summary: str = "auto",
-    ab_mode: bool = False,
-    bilingual: bool = False,
-    bilingual_style: str = "parallel",
-) -> AsyncIterator[str]:
-    """Execute the agent and yield SSE-formatted events.
-
-    Streams reasoning tokens, tool events, and text content via markers:
-    - __REASONING_REPLACE__...__END_REASONING_REPLACE__ for thinking
-    - __TOOL_EVENT__...__END_TOOL_EVENT__ for tool usage
-    - Plain text for content
-
-    Args:
-        message: User's input message.
-        platforms: Target platforms.
-        content_type: Content type.
-        language: Output language.
-        history: Conversation history for multi-turn.
-        reasoning_effort: GPT-5 reasoning depth (low/medium/high).
-        reasoning_summary: Thinking display mode (off/auto/concise/detailed).
-        ab_mode: If True, generate two content variants for A/B comparison.
-        bilingual: If True, generate content in both English and Japanese.
-        bilingual_style: "parallel" (separate posts) or "combined" (EN+JA in one post).
+@lru_cache(maxsize=8)
+def _build_tools(vector_store_id: str, mcp_server_url: str, iq_enabled: bool) -> tuple[Any, ...]:
+    """Build the agent tool list (hosted + custom @tool) for the given configuration.
 
-    Yields:
-        SSE-formatted strings for each event type.
+    Cached per configuration; the arguments are the config values that change
+    which tools are available, so a config update produces a fresh list.
     """
-    client = get_client()
-
     # Get hosted tools
     web_search_tool = AzureOpenAIResponsesClient.get_web_search_tool()
 
     # Build tool list
-    tools = [web_search_tool, generate_content, review_content, generate_image]
+    tools: list[Any] = [web_search_tool, generate_content, review_content, generate_image]
 
     # Add file_search if Vector Store is configured
-    vector_store_id = config.VECTOR_STORE_ID
     if vector_store_id:
         file_search_tool = AzureOpenAIResponsesClient.get_file_search_tool(
             vector_store_ids=[vector_store_id],
@@ -185,10 +293,10 @@ async def run_agent_stream(
         logger.warning("VECTOR_STORE_ID not set — file_search tool disabled. Run vector_store.py to create one.")
 
     # Add MCP tool (Microsoft Learn documentation)
-    if config.MCP_SERVER_URL:
+    if mcp_server_url:
         mcp_tool = AzureOpenAIResponsesClient.get_mcp_tool(
             name="microsoft_learn",
-            url=config.MCP_SERVER_URL,
+            url=mcp_server_url,
             description=(
                 "Search and retrieve official Microsoft Learn documentation, "
                 "code samples, and technical guides. Use for verifying facts, "
@@ -202,12 +310,12 @@ async def run_agent_stream(
             ],
         )
         tools.append(mcp_tool)
-        logger.info("MCP tool enabled (url=%s)", config.MCP_SERVER_URL)
+        logger.info("MCP tool enabled (url=%s)", mcp_server_url)
     else:
         logger.info("MCP_SERVER_URL not configured — MCP tool disabled")
 
     # Add Foundry IQ Agentic Retrieval if configured
-    if _iq_configured():
+    if iq_enabled:
         tools.append(search_knowledge_base)
         logger.info(
             "Foundry IQ tool enabled (endpoint=%s, kb=%s)",
@@ -217,6 +325,29 @@ async def run_agent_stream(
     else:
         logger.info("Foundry IQ not configured — search_knowledge_base tool disabled")
 
+    return tuple(tools)
+
+
+@lru_cache(maxsize=32)
+def _build_agent(
+    ab_mode: bool,
+    bilingual: bool,
+    bilingual_style: str,
+    reasoning_effort: str,
+    reasoning_summary: str,
+    vector_store_id: str,
+    mcp_server_url: str,
+    iq_enabled: bool,
+) -> Any:
+    """Create (or reuse) the configured agent.
+
+    ``agent.run()`` starts a new thread per call, so one agent instance can
+    serve every request with the same settings. Config values are part of
+    the cache key, so updating them (e.g. VECTOR_STORE_ID at startup)
+    builds a new agent.
+    """
+    tools = _build_tools(vector_store_id, mcp_server_url, iq_enabled)
+
     # Build reasoning options for gpt-5.2
     reasoning_opts: dict = {}
     if reasoning_effort and reasoning_effort != "off":
@@ -230,13 +361,63 @@ async def run_agent_stream(
 
     # Create agent with all tools (hosted + custom @tool)
     system_prompt = get_system_prompt(ab_mode=ab_mode, bilingual=bilingual, bilingual_style=bilingual_style)
-    agent = client.as_agent(
+    return get_client().as_agent(
         name="social_ai_studio_agent",
         instructions=system_prompt,
-        tools=tools,
+        tools=list(tools),
         default_options=default_options if default_options else None,
     )
 
+
+async def run_agent_stream(
+    message: str,
+    platforms: list[str],
+    content_type: str,
+    language: str,
+    history: list[dict] | None = None,
+    reasoning_effort: str = "medium",
+    reasoning_summary: str = "auto",
+    ab_mode: bool = False,
+    bilingual: bool = False,
+    bilingual_style: str = "parallel",
+) -> AsyncIterator[str]:
+    """Execute the agent and yield SSE-formatted events.
+
+    Streams reasoning tokens, tool events, and text content via markers:
+    - __REASONING_REPLACE__...__END_REASONING_REPLACE__ for thinking
+    - __TOOL_EVENT__...__END_TOOL_EVENT__ for tool usage
+    - Plain text for content
+
+    Args:
+        message: User's input message.
+        platforms: Target platforms.
+        content_type: Content type.
+        language: Output language.
+        history: Conversation history for multi-turn.
+        reasoning_effort: GPT-5 reasoning depth (low/medium/high).
+        reasoning_summary: Thinking display mode (off/auto/concise/detailed).
+        ab_mode: If True, generate two content variants for A/B comparison.
+        bilingual: If True, generate content in both English and Japanese.
+        bilingual_style: "parallel" (separate posts) or "combined" (EN+JA in one post).
+
+    Yields:
+        SSE-formatted strings for each event type.
+    """
+    # A/B mode must produce genuinely different variants — don't replay cached tool results
+    if ab_mode:
+        clear_memo_cache()
+
+    tool_config = (config.VECTOR_STORE_ID or "", config.MCP_SERVER_URL or "", _iq_configured())
+    tools = _build_tools(*tool_config)
+    agent = _build_agent(
+        ab_mode,
+        bilingual,
+        bilingual_style,
+        reasoning_effort,
+        reasoning_summary,
+        *tool_config,
+    )
+
     # Build the full query
     query = _build_query_with_context(message, platforms, content_type, language, history)
     logger.info("Agent processing: %s... (platforms=%s)", message[:80], platforms)
@@ -260,14 +441,32 @@ async def run_agent_stream(
     ctx = trace.set_span_in_context(pipeline_span)
     _tool_spans: dict[str, trace.Span] = {}  # call_id → span
 
-    # Accumulate reasoning text (SDK sends deltas; we accumulate + REPLACE)
-    accumulated_reasoning = ""
-    last_reasoning_send = 0.0
+    # Accumulate reasoning text (SDK sends deltas; we accumulate + REPLACE).
+    # Deltas are appended to a list and joined lazily, only when an update
+    # is actually sent, to avoid quadratic string concatenation.
+    reasoning_chunks: list[str] = []
+    reasoning_len = 0
+    reasoning_joined: str | None = ""  # None → chunks changed since last join
+    # Length of the last reasoning block sent; reasoning only grows, so an
+    # equal length means the frontend already has the current text
+    last_sent_reasoning_len = 0
+
+    def _reasoning_text() -> str:
+        nonlocal reasoning_joined
+        if reasoning_joined is None:
+            reasoning_joined = "".join(reasoning_chunks)
+            reasoning_chunks[:] = [reasoning_joined]
+        return reasoning_joined
+
+    # Monotonic clock so wall-clock adjustments can't stall the throttle
+    _monotonic_ns = time.monotonic_ns
+    _throttle_ns = REASONING_THROTTLE_MS * 1_000_000
+    last_reasoning_send = -_throttle_ns
 
     def _should_send_reasoning() -> bool:
         nonlocal last_reasoning_send
-        now = time.time() * 1000
-        if now - last_reasoning_send >= REASONING_THROTTLE_MS:
+        now = _monotonic_ns()
+        if now - last_reasoning_send >= _throttle_ns:
             last_reasoning_send = now
             return True
         return False
@@ -278,38 +477,24 @@ async def run_agent_stream(
     emitted_tool_ends: set[str] = set()
     # Map call_id → tool_name (function_result may not carry the name)
     call_id_to_name: dict[str, str] = {}
-    # Track which hosted tool NAMES have been detected
-    _detected_hosted: set[str] = set()
+    # Tool NAMES seen so far, kept in step with the sets above so membership
+    # checks and the final tools.used attribute never rebuild it
+    emitted_tool_names: set[str] = set()
 
     # ----- helpers for hosted tool event emission -----
     def _emit_start(tool_name: str, item_id: str) -> str | None:
-        if item_id not in emitted_tool_starts:
-            emitted_tool_starts.add(item_id)
-            call_id_to_name[item_id] = tool_name
-            _detected_hosted.add(tool_name)
-            return create_tool_event(tool_name, "started")
-        return None
+        if not _mark_once(emitted_tool_starts, item_id):
+            return None
+        emitted_tool_names.add(tool_name)
+        return create_tool_event(tool_name, "started")
 
     def _emit_end(tool_name: str, item_id: str) -> str | None:
-        if item_id not in emitted_tool_ends:
-            emitted_tool_ends.add(item_id)
-            _detected_hosted.add(tool_name)
-            # Ensure start was emitted first
-            if item_id not in emitted_tool_starts:
-                emitted_tool_starts.add(item_id)
-                call_id_to_name[item_id] = tool_name
-            return create_tool_event(tool_name, "completed")
-        return None
-
-    # Mapping of raw event substrings → canonical tool names
-    _HOSTED_PATTERNS: dict[str, str] = {
-        "web_search_call": "web_search",
-        "web_search": "web_search",
-        "file_search_call": "file_search",
-        "file_search": "file_search",
-        "mcp_call": "mcp_search",
-        "mcp_list_tools": "mcp_search",
-    }
+        if not _mark_once(emitted_tool_ends, item_id):
+            return None
+        # Ensure start was recorded first
+        emitted_tool_starts.add(item_id)
+        emitted_tool_names.add(tool_name)
+        return create_tool_event(tool_name, "completed")
 
     try:
         # Initialize per-request image store (side-channel for generate_image)
@@ -348,6 +533,10 @@ async def run_agent_stream(
         # Accumulate extracted image data for post-stream injection
         stream_result = StreamResult()
 
+        # Resolve log levels once — these logs sit on the per-event hot path
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        info_enabled = logger.isEnabledFor(logging.INFO)
+
         async for update in stream:
             # Each update is an AgentResponseUpdate with .contents list
             if not isinstance(update, AgentResponseUpdate):
@@ -363,18 +552,24 @@ async def run_agent_stream(
 
                 if ct == "text_reasoning" and content.text:
                     # GPT-5 reasoning token — accumulate and throttle
-                    if accumulated_reasoning and content.text.startswith(accumulated_reasoning):
+                    text = content.text
+                    if reasoning_len and len(text) >= reasoning_len and text.startswith(_reasoning_text()):
                         # SDK sent cumulative text — replace
-                        accumulated_reasoning = content.text
-                    elif accumulated_reasoning.endswith(content.text):
+                        reasoning_chunks[:] = [text]
+                        reasoning_len = len(text)
+                        reasoning_joined = text
+                    elif reasoning_chunks and reasoning_chunks[-1].endswith(text):
                         # Duplicate delta — ignore
                         pass
                     else:
                         # True delta — append
-                        accumulated_reasoning += content.text
+                        reasoning_chunks.append(text)
+                        reasoning_len += len(text)
+                        reasoning_joined = None
 
-                    if _should_send_reasoning():
-                        yield (f"{REASONING_START}{accumulated_reasoning}{REASONING_END}")
+                    if reasoning_len != last_sent_reasoning_len and _should_send_reasoning():
+                        last_sent_reasoning_len = reasoning_len
+                        yield f"{REASONING_START}{_reasoning_text()}{REASONING_END}"
 
                 elif ct == "function_call":
                     # Tool being invoked — emit only once per call_id
@@ -383,8 +578,8 @@ async def run_agent_stream(
                     # Remember for later function_result lookup
                     if tool_name != "unknown_tool":
                         call_id_to_name[call_id] = tool_name
-                    if call_id not in emitted_tool_starts:
-                        emitted_tool_starts.add(call_id)
+                        emitted_tool_names.add(tool_name)
+                    if _mark_once(emitted_tool_starts, call_id):
                         # OTel: start tool span
                         _tool_spans[call_id] = tracer.start_span(
                             f"tool.{tool_name}",
@@ -403,22 +598,16 @@ async def run_agent_stream(
                     # in tools.py, so we don't need to extract it from
                     # function_result (which may be truncated by the SDK).
 
-                    if call_id and call_id not in emitted_tool_ends:
-                        emitted_tool_ends.add(call_id)
+                    if call_id and _mark_once(emitted_tool_ends, call_id):
                         # OTel: end tool span
                         sp = _tool_spans.pop(call_id, None)
                         if sp:
                             sp.end()
                         yield create_tool_event(tool_name, "completed")
 
-                elif ct in (
-                    "web_search_call",
-                    "file_search_call",
-                    "mcp_call",
-                    "mcp_list_tools",
-                ):
+                elif ct in _HOSTED_ITEM_TYPES:
                     # Hosted tool exposed as a Content item (some SDK versions)
-                    tool_name = _HOSTED_PATTERNS.get(ct, "unknown_tool")
+                    tool_name = _HOSTED_ITEM_TYPES[ct]
                     item_id = getattr(content, "id", "") or getattr(content, "call_id", "") or tool_name
                     ev = _emit_start(tool_name, item_id)
                     if ev:
@@ -435,18 +624,18 @@ async def run_agent_stream(
                     annotations = getattr(content, "annotations", None) or []
                     for ann in annotations:
                         ann_type = getattr(ann, "type", "")
-                        if "url_citation" in ann_type and "web_search" not in _detected_hosted:
-                            ev = _emit_start("web_search", "ws_annotation")
+                        if "url_citation" in ann_type and _WEB_SEARCH not in emitted_tool_names:
+                            ev = _emit_start(_WEB_SEARCH, "ws_annotation")
                             if ev:
                                 yield ev
-                            ev = _emit_end("web_search", "ws_annotation")
+                            ev = _emit_end(_WEB_SEARCH, "ws_annotation")
                             if ev:
                                 yield ev
-                        elif "file_citation" in ann_type and "file_search" not in _detected_hosted:
-                            ev = _emit_start("file_search", "fs_annotation")
+                        elif "file_citation" in ann_type and _FILE_SEARCH not in emitted_tool_names:
+                            ev = _emit_start(_FILE_SEARCH, "fs_annotation")
                             if ev:
                                 yield ev
-                            ev = _emit_end("file_search", "fs_annotation")
+                            ev = _emit_end(_FILE_SEARCH, "fs_annotation")
                             if ev:
                                 yield ev
 
@@ -462,30 +651,35 @@ async def run_agent_stream(
                     if raw is not None:
                         resp = getattr(raw, "response", None)
                     if resp is not None:
-                        for out_item in getattr(resp, "output", []):
-                            item_type = getattr(out_item, "type", "")
-                            for pattern, tool_name in _HOSTED_PATTERNS.items():
-                                if pattern in item_type:
-                                    iid = getattr(out_item, "id", "") or tool_name
-                                    logger.info(
-                                        "Hosted tool from Response.output: type=%s → %s (id=%s)",
-                                        item_type,
-                                        tool_name,
-                                        iid,
-                                    )
-                                    ev = _emit_start(tool_name, iid)
-                                    if ev:
-                                        yield ev
-                                    ev = _emit_end(tool_name, iid)
-                                    if ev:
-                                        yield ev
-                                    break
+                        for out_item in getattr(resp, "output", None) or []:
+                            item_type = getattr(out_item, "type", None) or ""
+                            tool_name = _HOSTED_ITEM_TYPES.get(item_type)
+                            if tool_name is None:
+                                continue
+                            iid = getattr(out_item, "id", None) or tool_name
+                            if info_enabled:
+                                logger.info(
+                                    "Hosted tool from Response.output: type=%s → %s (id=%s)",
+                                    item_type,
+                                    tool_name,
+                                    iid,
+                                )
+                            ev = _emit_start(tool_name, iid)
+                            if ev:
+                                yield ev
+                            ev = _emit_end(tool_name, iid)
+                            if ev:
+                                yield ev
 
                 else:
                     # Unknown content type — log for debugging
-                    if ct:
+                    if ct and debug_enabled:
                         logger.debug("Unknown content type: %s", ct)
 
+            # Fallback: if update has .text but no contents processed
+            if not update.contents and update.text:
+                yield update.text
+
             # ---------------------------------------------------------
             # Detect hosted tool events from raw OpenAI stream event.
             # The agent-framework-core SDK may not parse these into
@@ -496,116 +690,79 @@ async def run_agent_stream(
             # Some SDK versions use different attribute names
             if raw_event is None:
                 raw_event = getattr(update, "raw_event", None)
+            raw_type = getattr(raw_event, "type", None) or ""
+            # Most updates are plain text/reasoning deltas with no typed raw event
+            if not raw_type:
+                continue
 
-            if raw_event is not None:
-                # Extract type string from raw event (handle dict or object)
-                if isinstance(raw_event, dict):
-                    raw_type = str(raw_event.get("type", ""))
+            # Log ALL raw events (not just search-related) for debugging
+            if debug_enabled:
+                logger.debug("Raw stream event: type=%s", raw_type)
+
+            # --- Hosted tool detection: exact event type → (tool, phase) ---
+            hosted = _RAW_EVENT_DISPATCH.get(raw_type)
+            item = None
+            if hosted is None:
+                if raw_type in _OUTPUT_ITEM_PHASES:
+                    item = getattr(raw_event, "item", None)
+                    tool_name = _HOSTED_ITEM_TYPES.get(getattr(item, "type", None) or "")
+                    if tool_name:
+                        hosted = (tool_name, _OUTPUT_ITEM_PHASES[raw_type])
                 else:
-                    raw_type = str(getattr(raw_event, "type", ""))
-
-                # Log ALL raw events (not just search-related) for debugging
-                if raw_type:
-                    logger.debug("Raw stream event: type=%s", raw_type)
+                    hosted = _classify_unknown_raw_type(raw_type)
 
-                # --- Unified hosted tool detection from raw_type ---
-                matched_tool = None
-                for pattern, tool_name in _HOSTED_PATTERNS.items():
-                    if pattern in raw_type:
-                        matched_tool = tool_name
-                        break
-
-                if matched_tool:
+            if hosted is not None:
+                tool_name, phase = hosted
+                if info_enabled:
                     logger.info(
                         "Hosted tool raw event: type=%s → %s",
                         raw_type,
-                        matched_tool,
+                        tool_name,
                     )
 
-                    # Extract item_id from the raw event
-                    if isinstance(raw_event, dict):
-                        item_id = str(raw_event.get("item_id", "") or raw_event.get("id", ""))
-                        item = raw_event.get("item")
-                    else:
-                        item_id = str(getattr(raw_event, "item_id", "") or getattr(raw_event, "id", ""))
-                        item = getattr(raw_event, "item", None)
-
-                    # Try to get item_id from nested item object
-                    if not item_id and item:
-                        if isinstance(item, dict):
-                            item_id = str(item.get("id", ""))
-                        else:
-                            item_id = str(getattr(item, "id", ""))
-                    if not item_id:
-                        item_id = matched_tool
-
-                    # Emit start or end based on event type
-                    is_completed = "completed" in raw_type or "done" in raw_type
-                    if is_completed:
-                        ev = _emit_end(matched_tool, item_id)
-                        if ev:
-                            yield ev
-                    else:
-                        ev = _emit_start(matched_tool, item_id)
-                        if ev:
-                            yield ev
-
-                # --- Also check for output_item events with hosted tool items ---
-                if "output_item" in raw_type:
-                    if isinstance(raw_event, dict):
-                        item = raw_event.get("item", {})
-                        item_type = item.get("type", "") if isinstance(item, dict) else ""
-                    else:
+                # item_id on *_call events, otherwise the nested item's id
+                item_id = getattr(raw_event, "item_id", None) or getattr(raw_event, "id", None)
+                if not item_id:
+                    if item is None:
                         item = getattr(raw_event, "item", None)
-                        item_type = str(getattr(item, "type", "")) if item else ""
-
-                    for pattern, tool_name in _HOSTED_PATTERNS.items():
-                        if pattern in item_type:
-                            if isinstance(item, dict):
-                                iid = str(item.get("id", "")) or tool_name
-                            else:
-                                iid = str(getattr(item, "id", "")) if item else tool_name
-
-                            if "done" in raw_type:
-                                ev = _emit_end(tool_name, iid)
-                                if ev:
-                                    yield ev
-                            else:
-                                ev = _emit_start(tool_name, iid)
-                                if ev:
-                                    yield ev
-                            break
+                    item_id = getattr(item, "id", None) or tool_name
 
-            # Fallback: if update has .text but no contents processed
-            if not update.contents and update.text:
-                yield update.text
+                if phase == "completed":
+                    ev = _emit_end(tool_name, item_id)
+                else:
+                    ev = _emit_start(tool_name, item_id)
+                if ev:
+                    yield ev
 
         # ---- Post-stream: synthesize events for configured but undetected tools ----
-        # If a hosted tool was configured but no events were detected during
-        # streaming, inspect the final response for evidence of usage and emit
-        # synthetic events so the frontend always shows what tools ran.
+        # If a hosted tool ran but no events were detected during streaming,
+        # the final response's output items still prove it; emit synthetic
+        # events so the frontend always shows what tools ran.
         stream_response = getattr(stream, "response", None)
         if stream_response is not None:
             try:
-                response = stream_response
-                for output_item in getattr(response, "output", []):
-                    item_type = getattr(output_item, "type", "")
-                    for pattern, tool_name in _HOSTED_PATTERNS.items():
-                        if pattern in item_type and tool_name not in _detected_hosted:
-                            iid = getattr(output_item, "id", "") or tool_name
-                            ev = _emit_start(tool_name, iid)
-                            if ev:
-                                yield ev
-                            ev = _emit_end(tool_name, iid)
-                            if ev:
-                                yield ev
-                            break
+                for output_item in getattr(stream_response, "output", None) or []:
+                    tool_name = _HOSTED_ITEM_TYPES.get(getattr(output_item, "type", None) or "")
+                    if tool_name is None or tool_name in emitted_tool_names:
+                        continue
+                    iid = getattr(output_item, "id", None) or tool_name
+                    ev = _emit_start(tool_name, iid)
+                    if ev:
+                        yield ev
+                    ev = _emit_end(tool_name, iid)
+                    if ev:
+                        yield ev
             except (AttributeError, TypeError):
                 pass  # best-effort
 
-        # Send final accumulated reasoning
-        if accumulated_reasoning:
-            yield (f"{REASONING_START}{accumulated_reasoning}{REASONING_END}")
+        if debug_enabled:
+            logger.debug("Stream ended: tools=%s", sorted(emitted_tool_names))
+
+        # Send final accumulated reasoning, unless the last throttled update
+        # already carried it. The frontend REPLACES its reasoning text with each
+        # block, so the final send is always the full text rather than a suffix.
+        if reasoning_len != last_sent_reasoning_len:
+            yield f"{REASONING_START}{_reasoning_text()}{REASONING_END}"
 
         # ---- Emit extracted image data as special markers ----
         # Primary: images stored via ContextVar side-channel in tools.py
@@ -615,10 +772,7 @@ async def run_agent_stream(
 
         if all_images:
             for platform, b64 in all_images.items():
-                image_event = json.dumps(
-                    {"platform": platform, "image_base64": b64},
-                    ensure_ascii=False,
-                )
+                image_event = encode_event({"platform": platform, "image_base64": b64})
                 yield f"{IMAGE_DATA_START}{image_event}{IMAGE_DATA_END}"
             logger.info(
                 "Emitted %d image(s): %s",
@@ -629,9 +783,9 @@ async def run_agent_stream(
         # ---- Finalize OTel pipeline span ----
         pipeline_span.set_attribute(
             "tools.used",
-            ",".join(sorted(_detected_hosted | set(call_id_to_name.values()))),
+            ",".join(sorted(emitted_tool_names)),
         )
-        pipeline_span.set_attribute("reasoning.chars", len(accumulated_reasoning))
+        pipeline_span.set_attribute("reasoning.chars", reasoning_len)
         pipeline_span.set_status(trace.StatusCode.OK)
         pipeline_span.end()
         # End any lingering tool spans
@@ -657,5 +811,5 @@ async def run_agent_stream(
             "type": "error",
             "message": user_message,
         }
-        yield json.dumps(error_event, ensure_ascii=False) + "\n\n"
+        yield encode_event(error_event) + "\n\n"
         raise
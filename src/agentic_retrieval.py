@@ -29,6 +29,7 @@ import httpx
 from agent_framework import tool
 
 from src.config import AI_SEARCH_API_KEY, AI_SEARCH_ENDPOINT, AI_SEARCH_KNOWLEDGE_BASE_NAME, AI_SEARCH_REASONING_EFFORT
+from src.tools import memoize_tool
 
 logger = logging.getLogger(__name__)
 
@@ -226,10 +227,14 @@ def _parse_response(response: dict, effort: str) -> dict[str, Any]:
     }
 
 
+# Prefix of formatted error results (never memoized — errors are often transient)
+_ERROR_PREFIX = "ナレッジベース検索エラー: "
+
+
 def _format_results(result: dict) -> str:
     """Format retrieval results for agent consumption."""
     if "error" in result:
-        return f"ナレッジベース検索エラー: {result['error']}"
+        return f"{_ERROR_PREFIX}{result['error']}"
 
     sources = result.get("sources", [])
     if not sources:
@@ -273,6 +278,7 @@ def _format_results(result: dict) -> str:
 
 
 @tool(approval_mode="never_require")
+@memoize_tool(is_cacheable=lambda result: not result.startswith(_ERROR_PREFIX))
 async def search_knowledge_base(
     query: Annotated[str, "The search query for finding relevant documents"],
     reasoning_effort: Annotated[
@@ -7,12 +7,13 @@ Provides:
 - GET /api/health — Health check
 """
 
+import asyncio
 import json
 import logging
 import os
 import re
 import uuid
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -31,6 +32,8 @@ from src.agent import (
     IMAGE_DATA_START,  # noqa: E402
     REASONING_END,
     REASONING_START,
+    TOOL_EVENT_START,
+    encode_event,
     run_agent_stream,
 )
 from src.config import DEBUG  # noqa: E402
@@ -47,7 +50,7 @@ from src.database import (
     save_conversation,
 )
 from src.models import ChatRequest  # noqa: E402
-from src.tools import generate_image, pop_pending_images  # noqa: E402
+from src.tools import generate_image, init_image_store, pop_pending_images  # noqa: E402
 
 # Configure logging
 logging.basicConfig(
@@ -112,6 +115,146 @@ REASONING_PATTERN = re.compile(rf"{re.escape(REASONING_START)}([\s\S]*?){re.esca
 IMAGE_DATA_PATTERN = re.compile(rf"{re.escape(IMAGE_DATA_START)}([\s\S]*?){re.escape(IMAGE_DATA_END)}")
 
 
+# SSE keepalive — comment frame sent periodically so proxies don't drop idle
+# connections while the agent is busy (long tool calls, image generation)
+KEEPALIVE_INTERVAL_S = 15.0
+SSE_KEEPALIVE = ": ping\n\n"
+_STREAM_END = object()
+_EMPTY = object()
+
+# Text coalescing — plain-text deltas already queued behind the one being
+# relayed are joined (up to N chars), so one marker scan and one SSE write
+# cover several tokens. Markers are always relayed on their own.
+TEXT_COALESCE_MAX_CHARS = 4096
+_MARKER_PREFIXES = (TOOL_EVENT_START, REASONING_START, IMAGE_DATA_START)
+
+
+async def _ticker(queue: asyncio.Queue, interval: float) -> None:
+    """Put a keepalive tick (``None``) on the queue every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        queue.put_nowait(None)
+
+
+async def _with_keepalive(events: AsyncIterator[str], queue: asyncio.Queue) -> AsyncIterator[str | None]:
+    """Relay ``events``, yielding ``None`` whenever a keepalive tick is due.
+
+    A pump task feeds the same queue a ``_ticker`` task fills, so the consumer
+    just awaits ``queue.get()`` — no per-chunk ``wait_for`` timeouts or
+    TimeoutError churn. The caller owns the ticker, so one ticker covers
+    every relay of a response. Consecutive text chunks that are already
+    queued are coalesced into one; text never waits for more to arrive.
+    """
+
+    async def _pump() -> None:
+        try:
+            async for chunk in events:
+                queue.put_nowait(chunk)
+        except Exception as exc:  # re-raised in the consumer
+            queue.put_nowait(exc)
+        finally:
+            queue.put_nowait(_STREAM_END)
+
+    pump_task = asyncio.create_task(_pump())
+    try:
+        item: object = _EMPTY
+        while True:
+            if item is _EMPTY:
+                item = await queue.get()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            if item is None or item.startswith(_MARKER_PREFIXES):
+                yield item
+                item = _EMPTY
+                continue
+
+            # Drain queued text without waiting; hold back the first non-text item
+            parts = [item]
+            size = len(item)
+            item = _EMPTY
+            while size < TEXT_COALESCE_MAX_CHARS and not queue.empty():
+                nxt = queue.get_nowait()
+                if not isinstance(nxt, str) or nxt.startswith(_MARKER_PREFIXES):
+                    item = nxt
+                    break
+                parts.append(nxt)
+                size += len(nxt)
+            yield parts[0] if len(parts) == 1 else "".join(parts)
+    finally:
+        pump_task.cancel()
+
+
+async def _post_stream_events(
+    chat_req: ChatRequest,
+    thread_id: str,
+    assistant_content: str,
+    emitted_image_platforms: set[str],
+) -> AsyncIterator[str]:
+    """Yield the SSE events that follow the agent stream: fallback images, safety, done.
+
+    Relayed through ``_with_keepalive`` by the chat endpoint, so image
+    generation and safety analysis get keepalive pings like the agent run.
+    """
+    # ---- Image fallback: generate missing visuals from image_prompt ----
+    required_image_platforms = {
+        p.lower().strip() for p in (chat_req.platforms or []) if p.lower().strip() in {"linkedin", "instagram"}
+    }
+    missing_platforms = required_image_platforms - emitted_image_platforms
+
+    if assistant_content and missing_platforms:
+        image_prompts = _extract_image_prompts(assistant_content)
+        for platform in sorted(missing_platforms):
+            prompt = image_prompts.get(platform, "")
+            if not prompt:
+                continue
+            try:
+                # Run the same tool used by the agent as a fallback path
+                await generate_image(prompt=prompt, platform=platform)
+                generated_images = pop_pending_images()
+                image_b64 = generated_images.get(platform, "")
+                if image_b64:
+                    emitted_image_platforms.add(platform)
+                    fallback_event = {
+                        "type": "image",
+                        "platform": platform,
+                        "image_base64": image_b64,
+                    }
+                    yield encode_event(fallback_event) + "\n\n"
+                    logger.info("Image fallback generated for platform=%s", platform)
+            except Exception as fallback_error:
+                logger.warning(
+                    "Image fallback failed for platform=%s: %s",
+                    platform,
+                    fallback_error,
+                )
+
+    # ---- Content Safety: analyze generated output ----
+    safety_result = (
+        await analyze_safety(assistant_content)
+        if assistant_content
+        else {"safe": True, "skipped": True, "reason": "No content generated"}
+    )
+    safety_event = {
+        "type": "safety",
+        "safety": safety_result,
+        "summary": format_safety_summary(safety_result),
+    }
+    yield encode_event(safety_event) + "\n\n"
+
+    if not safety_result.get("safe", True):
+        logger.warning(
+            "Content Safety flagged output (thread=%s): %s",
+            thread_id,
+            format_safety_summary(safety_result),
+        )
+
+    # Send done signal
+    done_event = {"type": "done", "thread_id": thread_id}
+    yield encode_event(done_event) + "\n\n"
+
+
 def _extract_image_prompts(content: str) -> dict[str, str]:
     """Extract platform -> image_prompt from assistant JSON output.
 
@@ -250,8 +393,15 @@ async def chat(request: Request) -> StreamingResponse:
         emitted_image_platforms: set[str] = set()
         _tracer = get_tracer()  # noqa: F841 — kept for future span creation
 
+        # Per-request image store in this context: the relays below run in
+        # pump tasks that copy it, so the fallback images stay isolated
+        init_image_store()
+        # One ticker for the whole response, not just the agent run
+        ticks: asyncio.Queue = asyncio.Queue()
+        ticker_task = asyncio.create_task(_ticker(ticks, KEEPALIVE_INTERVAL_S))
+
         try:
-            async for chunk in run_agent_stream(
+            agent_stream = run_agent_stream(
                 message=chat_req.message,
                 platforms=chat_req.platforms,
                 content_type=chat_req.content_type,
@@ -262,7 +412,11 @@ async def chat(request: Request) -> StreamingResponse:
                 ab_mode=chat_req.ab_mode,
                 bilingual=chat_req.bilingual,
                 bilingual_style=chat_req.bilingual_style,
-            ):
+            )
+            async for chunk in _with_keepalive(agent_stream, ticks):
+                if chunk is None:
+                    yield SSE_KEEPALIVE
+                    continue
                 if not chunk:
                     continue
 
@@ -287,7 +441,7 @@ async def chat(request: Request) -> StreamingResponse:
                             "platform": platform,
                             "image_base64": image_data.get("image_base64", ""),
                         }
-                        yield json.dumps(image_event, ensure_ascii=False) + "\n\n"
+                        yield encode_event(image_event) + "\n\n"
                     except json.JSONDecodeError:
                         logger.warning("Failed to parse image data marker")
                     continue
@@ -301,7 +455,7 @@ async def chat(request: Request) -> StreamingResponse:
                         "type": "reasoning_update",
                         "reasoning": reasoning_text,
                     }
-                    yield json.dumps(reasoning_event, ensure_ascii=False) + "\n\n"
+                    yield encode_event(reasoning_event) + "\n\n"
                     continue
 
                 # Regular text — accumulate and send as response chunk
@@ -323,7 +477,7 @@ async def chat(request: Request) -> StreamingResponse:
                         ],
                         "thread_id": thread_id,
                     }
-                    yield json.dumps(response, ensure_ascii=False) + "\n\n"
+                    yield encode_event(response) + "\n\n"
 
             # Save assistant response to history
             if assistant_content:
@@ -337,62 +491,12 @@ async def chat(request: Request) -> StreamingResponse:
                     messages=history,
                 )
 
-            # ---- Image fallback: generate missing visuals from image_prompt ----
-            required_image_platforms = {
-                p.lower().strip() for p in (chat_req.platforms or []) if p.lower().strip() in {"linkedin", "instagram"}
-            }
-            missing_platforms = required_image_platforms - emitted_image_platforms
-
-            if assistant_content and missing_platforms:
-                image_prompts = _extract_image_prompts(assistant_content)
-                for platform in sorted(missing_platforms):
-                    prompt = image_prompts.get(platform, "")
-                    if not prompt:
-                        continue
-                    try:
-                        # Run the same tool used by the agent as a fallback path
-                        await generate_image(prompt=prompt, platform=platform)
-                        generated_images = pop_pending_images()
-                        image_b64 = generated_images.get(platform, "")
-                        if image_b64:
-                            emitted_image_platforms.add(platform)
-                            fallback_event = {
-                                "type": "image",
-                                "platform": platform,
-                                "image_base64": image_b64,
-                            }
-                            yield json.dumps(fallback_event, ensure_ascii=False) + "\n\n"
-                            logger.info("Image fallback generated for platform=%s", platform)
-                    except Exception as fallback_error:
-                        logger.warning(
-                            "Image fallback failed for platform=%s: %s",
-                            platform,
-                            fallback_error,
-                        )
-
-            # ---- Content Safety: analyze generated output ----
-            safety_result = (
-                await analyze_safety(assistant_content)
-                if assistant_content
-                else {"safe": True, "skipped": True, "reason": "No content generated"}
-            )
-            safety_event = {
-                "type": "safety",
-                "safety": safety_result,
-                "summary": format_safety_summary(safety_result),
-            }
-            yield json.dumps(safety_event, ensure_ascii=False) + "\n\n"
-
-            if not safety_result.get("safe", True):
-                logger.warning(
-                    "Content Safety flagged output (thread=%s): %s",
-                    thread_id,
-                    format_safety_summary(safety_result),
-                )
-
-            # Send done signal
-            done_event = {"type": "done", "thread_id": thread_id}
-            yield json.dumps(done_event) + "\n\n"
+            # ---- Image fallback, Content Safety and done signal ----
+            async for frame in _with_keepalive(
+                _post_stream_events(chat_req, thread_id, assistant_content, emitted_image_platforms),
+                ticks,
+            ):
+                yield SSE_KEEPALIVE if frame is None else frame
 
         except Exception as e:
             logger.error("Stream error: %s", e, exc_info=True)
@@ -409,7 +513,9 @@ async def chat(request: Request) -> StreamingResponse:
                     " / An error occurred during content generation. Please try again."
                 )
             error_event = {"error": user_message}
-            yield json.dumps(error_event, ensure_ascii=False) + "\n\n"
+            yield encode_event(error_event) + "\n\n"
+        finally:
+            ticker_task.cancel()
 
     return StreamingResponse(
         generate(),
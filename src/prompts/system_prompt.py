@@ -8,6 +8,8 @@ Integrates three reasoning patterns into a single prompt:
 Supports A/B comparison mode for generating two content variants.
 """
 
+from functools import lru_cache
+
 _BASE_PROMPT = """
 # Role
 You are an expert social media content strategist and creator.
@@ -166,6 +168,13 @@ When the content type is **custom or freeform text**, deeply analyze the user's
 to determine the optimal tone, structure, and platform strategy. Use web_search if needed
 to understand the topic context better.
 
+# Input Format
+Requests arrive in a compact columnar form: a schema line naming the fields once,
+followed by one pipe-delimited row per record. Newlines inside a field are written as `\\n`.
+- `messages(role|content):` — previous conversation turns, oldest first
+- `request(platforms|type|lang|topic):` — the current request; `platforms` is comma-separated
+The last field of each row (`content` / `topic`) is free text and may itself contain `|`.
+
 # Important Rules
 - ALWAYS search for the latest information before creating content (use web_search)
 - ALWAYS check brand guidelines (use file_search or search_knowledge_base)
@@ -294,11 +303,17 @@ def get_system_prompt(*, ab_mode: bool = False, bilingual: bool = False, bilingu
     Returns:
         The complete system prompt string.
     """
+    return _assemble_prompt(bool(ab_mode), bool(bilingual), bool(bilingual) and bilingual_style == "combined")
+
+
+@lru_cache(maxsize=8)
+def _assemble_prompt(ab_mode: bool, bilingual: bool, combined: bool) -> str:
+    """Concatenate the prompt sections once per variant (8 at most)."""
     prompt = _BASE_PROMPT
     if ab_mode:
         prompt += "\n\n" + _AB_MODE_ADDENDUM
     if bilingual:
-        if bilingual_style == "combined":
+        if combined:
             prompt += "\n\n" + _BILINGUAL_COMBINED_ADDENDUM
         else:
             prompt += "\n\n" + _BILINGUAL_ADDENDUM
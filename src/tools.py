@@ -5,8 +5,15 @@ The LLM decides when and how to call these tools based on context.
 """
 
 import asyncio
+import functools
+import hashlib
+import inspect
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from contextvars import ContextVar
 from typing import Annotated
 
@@ -66,6 +73,104 @@ def pop_pending_images() -> dict[str, str]:
     return merged
 
 
+# ---------------------------------------------------------------------------
+# Tool result memoization
+# ---------------------------------------------------------------------------
+# The agent frequently re-invokes a tool with identical arguments (e.g. the
+# Self-Reflection phase re-reviewing an unchanged draft). Idempotent tools opt
+# in with @memoize_tool so repeat calls return the cached result immediately.
+# generate_image is intentionally NOT memoized: its result is a side effect
+# (image stored in the per-request side-channel), not the returned metadata.
+MEMO_CACHE_MAX_ENTRIES = 256
+
+ToolFunc = Callable[..., Awaitable[str]]
+
+_memo_cache: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+_memo_lock = threading.Lock()
+
+# Single-flight: concurrent identical calls share one detached task instead
+# of running the tool again (second layer behind the memo cache)
+_inflight: dict[tuple[str, str], asyncio.Task[str]] = {}
+
+
+def _release_inflight(key: tuple[str, str], task: asyncio.Task[str]) -> None:
+    """Done callback: drop the in-flight entry so later calls don't join a dead task."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved; awaiting callers still receive it
+
+
+def _memo_key(name: str, sig: inspect.Signature, args: tuple, kwargs: dict) -> tuple[str, str]:
+    """Build a cache key from the tool name and its normalized arguments."""
+    bound = sig.bind(*args, **kwargs)
+    bound.apply_defaults()
+    payload = json.dumps(bound.arguments, sort_keys=True, default=str)
+    return name, hashlib.sha256(payload.encode()).hexdigest()
+
+
+def memoize_tool(
+    ttl: float = 600.0,
+    is_cacheable: Callable[[str], bool] | None = None,
+) -> Callable[[ToolFunc], ToolFunc]:
+    """Cache an async tool's result keyed by ``(tool_name, sha256(args))``.
+
+    Concurrent calls with the same key share a single in-flight execution.
+    Must be applied below ``@tool`` so the framework still sees the original
+    signature (preserved via ``functools.wraps``).
+
+    Args:
+        ttl: Seconds a cached result stays valid.
+        is_cacheable: Optional predicate; results for which it returns False
+            (e.g. transient error messages) are not stored.
+    """
+
+    def decorator(func: ToolFunc) -> ToolFunc:
+        sig = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> str:
+            key = _memo_key(func.__name__, sig, args, kwargs)
+            with _memo_lock:
+                hit = _memo_cache.get(key)
+                if hit is not None and hit[0] > time.monotonic():
+                    _memo_cache.move_to_end(key)
+                    logger.debug("Tool cache hit: %s", func.__name__)
+                    return hit[1]
+
+            loop = asyncio.get_running_loop()
+            task = _inflight.get(key)
+            if task is not None and task.get_loop() is loop:
+                logger.debug("Tool call joined in-flight request: %s", func.__name__)
+            else:
+                # Detached task: no single caller's cancellation stops the shared call
+                task = asyncio.ensure_future(_execute(key, args, kwargs))
+                _inflight[key] = task
+                task.add_done_callback(functools.partial(_release_inflight, key))
+            # shield: a cancelled caller stops waiting without cancelling the task
+            return await asyncio.shield(task)
+
+        async def _execute(key: tuple[str, str], args: tuple, kwargs: dict) -> str:
+            result = await func(*args, **kwargs)
+            if is_cacheable is None or is_cacheable(result):
+                with _memo_lock:
+                    _memo_cache[key] = (time.monotonic() + ttl, result)
+                    _memo_cache.move_to_end(key)
+                    while len(_memo_cache) > MEMO_CACHE_MAX_ENTRIES:
+                        _memo_cache.popitem(last=False)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def clear_memo_cache() -> None:
+    """Drop all memoized tool results (e.g. to force fresh A/B variants)."""
+    with _memo_lock:
+        _memo_cache.clear()
+
+
 # Platform character limits and formatting rules
 PLATFORM_RULES: dict[str, dict] = {
     "linkedin": {
@@ -93,6 +198,7 @@ PLATFORM_RULES: dict[str, dict] = {
 
 
 @tool(approval_mode="never_require")
+@memoize_tool()
 async def generate_content(
     topic: Annotated[str, "The content topic or theme"],
     platform: Annotated[str, "Target platform: linkedin, x, or instagram"],
@@ -139,6 +245,7 @@ async def generate_content(
 
 
 @tool(approval_mode="never_require")
+@memoize_tool()
 async def review_content(
     content: Annotated[str, "The content text to review"],
     platform: Annotated[str, "Target platform: linkedin, x, or instagram"],
@@ -17,6 +17,16 @@ def _reset_database_state():
     db.restore_database_state_for_tests(snapshot)
 
 
+@pytest.fixture(autouse=True)
+def _reset_tool_memo_cache():
+    """Clear memoized tool results so no test depends on another's cache."""
+    from src.tools import clear_memo_cache
+
+    clear_memo_cache()
+    yield
+    clear_memo_cache()
+
+
 @pytest.fixture
 def mock_env(monkeypatch):
     """Helper to set environment variables for config tests."""
@@ -1,15 +1,29 @@
 """Tests for src/agent.py — agent creation helpers and tool event formatting."""
 
 import json
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from agent_framework import AgentResponseUpdate, Content
 
 from src.agent import (
+    _HOSTED_ITEM_TYPES,
+    _OUTPUT_ITEM_PHASES,
+    _RAW_EVENT_DISPATCH,
     REASONING_END,
     REASONING_START,
     REASONING_THROTTLE_MS,
     TOOL_EVENT_END,
     TOOL_EVENT_START,
+    _build_agent,
     _build_query_with_context,
+    _build_tools,
+    _classify_unknown_raw_type,
+    _mark_once,
     create_tool_event,
+    encode_event,
+    run_agent_stream,
 )
 
 
@@ -50,6 +64,14 @@ class TestCreateToolEvent:
         # ISO 8601 should contain T and +00:00 or Z
         assert "T" in data["timestamp"]
 
+    def test_template_matches_fallback_shape(self):
+        known = json.loads(create_tool_event("web_search", "started")[len(TOOL_EVENT_START) : -len(TOOL_EVENT_END)])
+        unknown = json.loads(create_tool_event("custom_tool", "started")[len(TOOL_EVENT_START) : -len(TOOL_EVENT_END)])
+        assert known.keys() == unknown.keys()
+        assert known["tool"] == "web_search"
+        assert known["status"] == "started"
+        assert datetime.fromisoformat(known["timestamp"]).microsecond == 0
+
     def test_japanese_message(self):
         result = create_tool_event("test", "completed", "画像生成完了")
         json_str = result[len(TOOL_EVENT_START) : -len(TOOL_EVENT_END)]
@@ -57,6 +79,18 @@ class TestCreateToolEvent:
         assert data["message"] == "画像生成完了"
 
 
+class TestEncodeEvent:
+    """Test encode_event SSE payload serializer."""
+
+    def test_compact_and_unescaped(self):
+        assert encode_event({"type": "done", "text": "完了"}) == '{"type":"done","text":"完了"}'
+
+    @patch("src.agent.orjson", None)
+    def test_stdlib_fallback_matches(self):
+        event = {"type": "safety", "safety": {"safe": True, "scores": {1: 0.5}}, "text": "完了"}
+        assert encode_event(event) == '{"type":"safety","safety":{"safe":true,"scores":{"1":0.5}},"text":"完了"}'
+
+
 class TestBuildQueryWithContext:
     """Test _build_query_with_context helper."""
 
@@ -106,6 +140,36 @@ class TestBuildQueryWithContext:
         assert "msg-4" in result  # 10-6=4, so msg-4..msg-9
         assert "msg-0" not in result
 
+    def test_columnar_rows(self):
+        history = [{"role": "user", "content": "Hello"}, {"role": "assistant", "content": "Hi there"}]
+        result = _build_query_with_context(
+            message="AI launch",
+            platforms=["linkedin", "x"],
+            content_type="product_launch",
+            language="en",
+            history=history,
+        )
+        assert "messages(role|content):\nuser|Hello\nassistant|Hi there\n" in result
+        assert "request(platforms|type|lang|topic):\nlinkedin, x|product_launch|en|AI launch\n" in result
+
+    def test_multiline_fields_stay_on_one_row(self):
+        history = [{"role": "assistant", "content": "line 1\nline 2"}]
+        result = _build_query_with_context(
+            message="topic\nwith details",
+            platforms=["x"],
+            content_type="trend",
+            language="en",
+            history=history,
+        )
+        assert "assistant|line 1\\nline 2\n" in result
+        assert "x|trend|en|topic\\nwith details\n" in result
+
+    def test_braces_in_message_kept_verbatim(self):
+        result = _build_query_with_context(
+            message="{platforms} {0}", platforms=["x"], content_type="trend", language="en"
+        )
+        assert "x|trend|en|{platforms} {0}\n" in result
+
     def test_single_platform(self):
         result = _build_query_with_context(message="test", platforms=["instagram"], content_type="event", language="ja")
         assert "instagram" in result
@@ -122,6 +186,239 @@ class TestBuildQueryWithContext:
         assert "Previous conversation" not in result
 
 
+async def _collect(**kwargs) -> list[str]:
+    return [chunk async for chunk in run_agent_stream("topic", ["x"], "trend", "en", **kwargs)]
+
+
+class TestMarkOnce:
+    """Test _mark_once dedup helper."""
+
+    def test_first_time_only(self):
+        seen: set[str] = set()
+        assert _mark_once(seen, "call-1") is True
+        assert _mark_once(seen, "call-1") is False
+        assert _mark_once(seen, "call-2") is True
+        assert seen == {"call-1", "call-2"}
+
+
+class TestRawEventDispatch:
+    """Test the hosted tool raw event lookup tables."""
+
+    def test_dispatch_targets_known_tools(self):
+        tools = set(_HOSTED_ITEM_TYPES.values())
+        for raw_type, (tool, phase) in _RAW_EVENT_DISPATCH.items():
+            assert tool in tools, raw_type
+            assert phase in ("started", "completed"), raw_type
+
+    def test_completed_events_end_tool(self):
+        assert _RAW_EVENT_DISPATCH["response.web_search_call.completed"] == ("web_search", "completed")
+        assert _RAW_EVENT_DISPATCH["response.file_search_call.searching"] == ("file_search", "started")
+        assert _RAW_EVENT_DISPATCH["response.mcp_call.failed"] == ("mcp_search", "completed")
+
+    def test_unknown_hosted_type_classified(self):
+        assert _classify_unknown_raw_type("response.web_search_call.failed") == ("web_search", "completed")
+        assert _classify_unknown_raw_type("response.file_search_call.queued") == ("file_search", "started")
+
+    def test_unrelated_type_ignored(self):
+        assert _classify_unknown_raw_type("response.output_text.delta") is None
+
+    def test_output_item_phases(self):
+        assert _OUTPUT_ITEM_PHASES["response.output_item.added"] == "started"
+        assert _OUTPUT_ITEM_PHASES["response.output_item.done"] == "completed"
+
+
+class _FakeStream:
+    """Async-iterable response stream with an optional final ``response``."""
+
+    def __init__(self, updates: list[AgentResponseUpdate], response=None):
+        self._updates = updates
+        self.response = response
+
+    async def __aiter__(self):
+        for update in self._updates:
+            yield update
+
+
+class _FakeAgent:
+    """Stand-in for the framework agent: replays canned stream updates."""
+
+    def __init__(self, updates: list[AgentResponseUpdate], response=None):
+        self._updates = updates
+        self._response = response
+
+    def run(self, _query, stream: bool = True):
+        assert stream
+        return _FakeStream(self._updates, self._response)
+
+
+def _tool_events(chunks: list[str]) -> list[tuple[str, str]]:
+    events = []
+    for chunk in chunks:
+        if chunk.startswith(TOOL_EVENT_START):
+            data = json.loads(chunk[len(TOOL_EVENT_START) : -len(TOOL_EVENT_END)])
+            events.append((data["tool"], data["status"]))
+    return events
+
+
+async def _run_with_updates(updates: list[AgentResponseUpdate], response=None) -> list[str]:
+    with (
+        patch("src.agent._build_agent", return_value=_FakeAgent(updates, response)),
+        patch("src.agent.pop_pending_images", return_value={}),
+    ):
+        return await _collect()
+
+
+def _reasoning_update(text: str) -> AgentResponseUpdate:
+    return AgentResponseUpdate(contents=[Content.from_text_reasoning(text=text)])
+
+
+def _reasoning_payloads(chunks: list[str]) -> list[str]:
+    return [m for c in chunks if (m := c.removeprefix(REASONING_START).removesuffix(REASONING_END)) != c]
+
+
+class TestRunAgentStreamReasoning:
+    """Test reasoning accumulation in the agent stream."""
+
+    @pytest.mark.asyncio
+    @patch("src.agent.REASONING_THROTTLE_MS", 0)
+    async def test_deltas_accumulate(self):
+        chunks = await _run_with_updates([_reasoning_update("Think"), _reasoning_update("ing")])
+        assert _reasoning_payloads(chunks)[-1] == "Thinking"
+
+    @pytest.mark.asyncio
+    @patch("src.agent.REASONING_THROTTLE_MS", 0)
+    async def test_cumulative_text_replaces(self):
+        updates = [_reasoning_update("Step"), _reasoning_update(" one"), _reasoning_update("Step one, two")]
+        chunks = await _run_with_updates(updates)
+        assert _reasoning_payloads(chunks)[-1] == "Step one, two"
+
+    @pytest.mark.asyncio
+    @patch("src.agent.REASONING_THROTTLE_MS", 0)
+    async def test_duplicate_delta_ignored(self):
+        updates = [_reasoning_update("Plan"), _reasoning_update(" A"), _reasoning_update(" A")]
+        chunks = await _run_with_updates(updates)
+        assert _reasoning_payloads(chunks)[-1] == "Plan A"
+
+
+class TestRunAgentStreamHostedTools:
+    """Test hosted tool event detection in the agent stream."""
+
+    @pytest.mark.asyncio
+    async def test_post_stream_output_synthesizes_events(self):
+        response = MagicMock()
+        response.output = [MagicMock(type="web_search_call", id="ws_1"), MagicMock(type="message", id="msg_1")]
+        chunks = await _run_with_updates([], response=response)
+        assert _tool_events(chunks) == [("web_search", "started"), ("web_search", "completed")]
+
+    @pytest.mark.asyncio
+    async def test_post_stream_skips_already_detected(self):
+        raw = MagicMock(type="response.web_search_call.completed", item_id="ws_1")
+        updates = [AgentResponseUpdate(contents=[], raw_representation=raw)]
+        response = MagicMock()
+        response.output = [MagicMock(type="web_search_call", id="ws_1")]
+        chunks = await _run_with_updates(updates, response=response)
+        assert _tool_events(chunks) == [("web_search", "completed")]
+
+    @pytest.mark.asyncio
+    async def test_usage_output_items_matched_exactly(self):
+        usage = MagicMock(type="usage")
+        usage.raw_representation.response.output = [
+            MagicMock(type="file_search_call", id="fs_1"),
+            MagicMock(type="web_search_preview", id="wsp_1"),
+        ]
+        chunks = await _run_with_updates([AgentResponseUpdate(contents=[usage])])
+        assert _tool_events(chunks) == [("file_search", "started"), ("file_search", "completed")]
+
+    @pytest.mark.asyncio
+    async def test_untyped_raw_event_skipped(self):
+        untyped = MagicMock(type=None)
+        raw = MagicMock(type="response.web_search_call.completed", item_id="ws_1")
+        updates = [
+            AgentResponseUpdate(contents=[Content.from_text(text="hi")], raw_representation=untyped),
+            AgentResponseUpdate(contents=[], raw_representation=raw),
+        ]
+        chunks = await _run_with_updates(updates)
+        assert "hi" in "".join(chunks)
+        assert _tool_events(chunks) == [("web_search", "completed")]
+
+    @pytest.mark.asyncio
+    async def test_tools_used_span_attribute(self):
+        raw = MagicMock(type="response.file_search_call.completed", item_id="fs_1")
+        call = Content.from_function_call(call_id="c1", name="generate_content", arguments="{}")
+        updates = [AgentResponseUpdate(contents=[call]), AgentResponseUpdate(contents=[], raw_representation=raw)]
+        tracer = MagicMock()
+        with patch("src.agent.get_tracer", return_value=tracer):
+            await _run_with_updates(updates)
+        pipeline_span = tracer.start_span.return_value
+        pipeline_span.set_attribute.assert_any_call("tools.used", "file_search,generate_content")
+
+
+class TestRunAgentStreamFinalReasoning:
+    """Test the end-of-stream reasoning flush."""
+
+    @pytest.mark.asyncio
+    @patch("src.agent.REASONING_THROTTLE_MS", 0)
+    async def test_no_resend_when_unchanged(self):
+        chunks = await _run_with_updates([_reasoning_update("Done thinking")])
+        assert _reasoning_payloads(chunks) == ["Done thinking"]
+
+    @pytest.mark.asyncio
+    @patch("src.agent.REASONING_THROTTLE_MS", 60_000)
+    async def test_final_send_when_throttled(self):
+        chunks = await _run_with_updates([_reasoning_update("a"), _reasoning_update("b")])
+        assert _reasoning_payloads(chunks) == ["a", "ab"]
+
+    @pytest.mark.asyncio
+    @patch("src.agent.REASONING_THROTTLE_MS", 0)
+    async def test_duplicate_delta_not_resent(self):
+        chunks = await _run_with_updates([_reasoning_update("Plan"), _reasoning_update("Plan")])
+        assert _reasoning_payloads(chunks) == ["Plan"]
+
+
+class TestBuildAgentCache:
+    """Test cached tool list and agent construction."""
+
+    def setup_method(self):
+        _build_agent.cache_clear()
+        _build_tools.cache_clear()
+
+    def teardown_method(self):
+        _build_agent.cache_clear()
+        _build_tools.cache_clear()
+
+    def test_tools_follow_config(self):
+        base = _build_tools("", "", False)
+        with_vs = _build_tools("vs_123", "", False)
+        assert len(with_vs) == len(base) + 1
+        assert _build_tools("", "", False) is base
+
+    @patch("src.agent.get_client")
+    def test_agent_reused_for_same_settings(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        args = (False, False, "parallel", "medium", "auto", "", "", False)
+
+        first = _build_agent(*args)
+        second = _build_agent(*args)
+        assert first is second
+        assert mock_client.as_agent.call_count == 1
+
+        _build_agent(True, False, "parallel", "medium", "auto", "", "", False)
+        assert mock_client.as_agent.call_count == 2
+
+    @patch("src.agent.get_client")
+    def test_reasoning_options(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        _build_agent(False, False, "parallel", "high", "off", "", "", False)
+        options = mock_client.as_agent.call_args.kwargs["default_options"]
+        assert options == {"reasoning": {"effort": "high"}}
+
+        _build_agent(False, False, "parallel", "off", "off", "", "", False)
+        assert mock_client.as_agent.call_args.kwargs["default_options"] is None
+
+
 class TestConstants:
     """Test agent module constants."""
 
@@ -1,12 +1,22 @@
 """Tests for src/api.py — FastAPI endpoints."""
 
+import asyncio
 import json
 from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api import REASONING_PATTERN, TOOL_EVENT_PATTERN, _extract_image_prompts, app
+from src.agent import REASONING_END, REASONING_START, create_tool_event
+from src.api import (
+    REASONING_PATTERN,
+    SSE_KEEPALIVE,
+    TOOL_EVENT_PATTERN,
+    _extract_image_prompts,
+    _ticker,
+    _with_keepalive,
+    app,
+)
 
 
 @pytest.fixture(name="api_client")
@@ -118,6 +128,138 @@ class TestChatEndpoint:
         # Should contain a done event
         assert '"type": "done"' in body or '"type":"done"' in body
 
+    @patch("src.api.KEEPALIVE_INTERVAL_S", 0.01)
+    @patch("src.api.run_agent_stream")
+    def test_chat_sends_keepalive_while_idle(self, mock_stream, api_client, sample_chat_body):
+        async def fake_stream(*_args, **_kwargs):
+            await asyncio.sleep(0.05)
+            yield "content text"
+
+        mock_stream.return_value = fake_stream()
+        response = api_client.post("/api/chat", json=sample_chat_body)
+        assert SSE_KEEPALIVE in response.text
+        assert response.headers["x-accel-buffering"] == "no"
+
+    @patch("src.api.KEEPALIVE_INTERVAL_S", 0.01)
+    @patch("src.api.analyze_safety")
+    @patch("src.api.run_agent_stream")
+    def test_keepalive_continues_after_agent_stream(self, mock_stream, mock_safety, api_client, sample_chat_body):
+        async def fake_stream(*_args, **_kwargs):
+            yield "content text"
+
+        async def slow_safety(*_args, **_kwargs):
+            await asyncio.sleep(0.05)
+            return {"safe": True}
+
+        mock_stream.return_value = fake_stream()
+        mock_safety.side_effect = slow_safety
+        body = api_client.post("/api/chat", json=sample_chat_body).text
+        assert SSE_KEEPALIVE in body[body.index("content text") :]
+
+
+async def _relay(events, interval: float):
+    """Run ``_with_keepalive`` with its own ticker, as the chat endpoint does."""
+    queue: asyncio.Queue = asyncio.Queue()
+    ticker_task = asyncio.create_task(_ticker(queue, interval))
+    try:
+        async for chunk in _with_keepalive(events, queue):
+            yield chunk
+    finally:
+        ticker_task.cancel()
+
+
+class TestWithKeepalive:
+    """Test the keepalive relay used by the chat stream."""
+
+    @pytest.mark.asyncio
+    async def test_relays_chunks_in_order(self):
+        async def events():
+            for chunk in ("a", "b", "c"):
+                yield chunk
+                await asyncio.sleep(0.01)
+
+        assert [c async for c in _relay(events(), 60)] == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_queued_text_coalesced(self):
+        async def events():
+            for token in ("Hel", "lo", " world"):
+                yield token
+
+        assert [c async for c in _relay(events(), 60)] == ["Hello world"]
+
+    @pytest.mark.asyncio
+    async def test_markers_never_merged(self):
+        tool_event = create_tool_event("web_search", "started")
+        reasoning = f"{REASONING_START}thinking{REASONING_END}"
+
+        async def events():
+            yield "a"
+            yield tool_event
+            yield "b"
+            yield "c"
+            yield reasoning
+
+        assert [c async for c in _relay(events(), 60)] == ["a", tool_event, "bc", reasoning]
+
+    @pytest.mark.asyncio
+    @patch("src.api.TEXT_COALESCE_MAX_CHARS", 4)
+    async def test_coalesce_size_cap(self):
+        async def events():
+            for token in ("ab", "cd", "ef"):
+                yield token
+
+        assert [c async for c in _relay(events(), 60)] == ["abcd", "ef"]
+
+    @pytest.mark.asyncio
+    async def test_text_relayed_while_upstream_stalled(self):
+        stall_over = False
+
+        async def events():
+            nonlocal stall_over
+            yield "I'll search first."
+            await asyncio.sleep(0.2)  # e.g. hosted tool call with no stream updates
+            stall_over = True
+            yield " Done."
+
+        received = [(c, stall_over) async for c in _relay(events(), 60)]
+        assert received == [("I'll search first.", False), (" Done.", True)]
+
+    @pytest.mark.asyncio
+    async def test_ticks_while_idle(self):
+        async def events():
+            await asyncio.sleep(0.05)
+            yield "done"
+
+        chunks = [c async for c in _relay(events(), 0.01)]
+        assert chunks[-1] == "done"
+        assert None in chunks
+
+    @pytest.mark.asyncio
+    async def test_propagates_errors(self):
+        async def events():
+            yield "partial"
+            raise RuntimeError("boom")
+
+        chunks: list[str | None] = []
+        with pytest.raises(RuntimeError):
+            async for chunk in _relay(events(), 60):
+                chunks.append(chunk)
+        assert chunks == ["partial"]
+
+    @pytest.mark.asyncio
+    async def test_text_flushed_before_error(self):
+        async def events():
+            yield "part"
+            yield "ial"
+            raise RuntimeError("boom")
+
+        chunks: list[str | None] = []
+        with pytest.raises(RuntimeError):
+            async for chunk in _relay(events(), 60):
+                chunks.append(chunk)
+        assert chunks == ["partial"]
+
 
 class TestRegexPatterns:
     """Test the regex patterns used for SSE parsing."""
@@ -238,3 +380,22 @@ class TestImageFallback:
         assert response.status_code == 200
         assert '"type": "image"' in response.text or '"type":"image"' in response.text
         assert '"platform": "linkedin"' in response.text or '"platform":"linkedin"' in response.text
+
+    @patch("src.api.generate_image")
+    @patch("src.api.run_agent_stream")
+    def test_fallback_image_uses_request_image_store(self, mock_stream, mock_generate_image, api_client):
+        from src.tools import _pending_images
+
+        async def fake_stream(*_args, **_kwargs):
+            yield '{"contents": [{"platform": "linkedin", "image_prompt": "office"}]}'
+
+        async def fake_generate_image(*, prompt, platform):
+            # Only the per-request ContextVar store, not the process-wide fallback
+            _pending_images.get()[platform] = "abc123"
+            return '{"status":"generated"}'
+
+        mock_stream.return_value = fake_stream()
+        mock_generate_image.side_effect = fake_generate_image
+        body = {"message": "test", "platforms": ["linkedin"]}
+        response = api_client.post("/api/chat", json=body)
+        assert '"image_base64":"abc123"' in response.text
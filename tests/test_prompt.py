@@ -48,3 +48,18 @@ class TestGetSystemPrompt:
     def test_mcp_instruction_in_base(self):
         """MCP tool usage should be mentioned in base prompt."""
         assert "microsoft_learn" in _BASE_PROMPT or "MCP" in _BASE_PROMPT
+
+    def test_input_format_documented(self):
+        """Columnar query schema used by agent._build_query_with_context."""
+        assert "messages(role|content):" in _BASE_PROMPT
+        assert "request(platforms|type|lang|topic):" in _BASE_PROMPT
+
+    def test_same_variant_reuses_string(self):
+        assert get_system_prompt(ab_mode=True) is get_system_prompt(ab_mode=True, bilingual=False)
+
+    def test_bilingual_styles_differ(self):
+        parallel = get_system_prompt(bilingual=True, bilingual_style="parallel")
+        combined = get_system_prompt(bilingual=True, bilingual_style="combined")
+        assert parallel != combined
+        assert get_system_prompt(bilingual=True, bilingual_style="unknown") is parallel
+        assert get_system_prompt(bilingual_style="combined") is get_system_prompt()
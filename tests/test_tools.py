@@ -1,10 +1,11 @@
 """Tests for src/tools.py — custom agent tool functions."""
 
+import asyncio
 import json
 
 import pytest
 
-from src.tools import PLATFORM_RULES, generate_content, review_content
+from src.tools import PLATFORM_RULES, clear_memo_cache, generate_content, memoize_tool, review_content
 
 
 class TestPlatformRules:
@@ -150,3 +151,122 @@ class TestReviewContent:
         result = await review_content(content="test", platform="linkedin")
         data = json.loads(result)
         assert data["brand_guidelines_provided"] is False
+
+
+class TestMemoizeTool:
+    """Test memoize_tool decorator and clear_memo_cache."""
+
+    def setup_method(self):
+        clear_memo_cache()
+
+    def teardown_method(self):
+        clear_memo_cache()
+
+    @staticmethod
+    def _counting_tool(**memo_kwargs):
+        calls: list[str] = []
+
+        @memoize_tool(**memo_kwargs)
+        async def echo(text: str, suffix: str = "") -> str:
+            calls.append(text)
+            return f"{text}{suffix}"
+
+        return echo, calls
+
+    @pytest.mark.asyncio
+    async def test_repeat_call_hits_cache(self):
+        echo, calls = self._counting_tool()
+        assert await echo(text="hi") == "hi"
+        assert await echo(text="hi") == "hi"
+        assert calls == ["hi"]
+
+    @pytest.mark.asyncio
+    async def test_positional_and_default_args_share_key(self):
+        echo, calls = self._counting_tool()
+        await echo("hi")
+        await echo(text="hi", suffix="")
+        assert calls == ["hi"]
+
+    @pytest.mark.asyncio
+    async def test_different_args_miss(self):
+        echo, calls = self._counting_tool()
+        await echo(text="a")
+        await echo(text="b")
+        assert calls == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_recomputed(self):
+        echo, calls = self._counting_tool(ttl=0)
+        await echo(text="hi")
+        await echo(text="hi")
+        assert calls == ["hi", "hi"]
+
+    @pytest.mark.asyncio
+    async def test_uncacheable_result_not_stored(self):
+        echo, calls = self._counting_tool(is_cacheable=lambda result: result != "error")
+        await echo(text="error")
+        await echo(text="error")
+        assert calls == ["error", "error"]
+
+    @pytest.mark.asyncio
+    async def test_clear_memo_cache(self):
+        echo, calls = self._counting_tool()
+        await echo(text="hi")
+        clear_memo_cache()
+        await echo(text="hi")
+        assert calls == ["hi", "hi"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_single_flight(self):
+        calls: list[str] = []
+
+        @memoize_tool()
+        async def slow(text: str) -> str:
+            calls.append(text)
+            await asyncio.sleep(0.01)
+            return text.upper()
+
+        results = await asyncio.gather(slow(text="hi"), slow(text="hi"), slow(text="hi"))
+        assert results == ["HI", "HI", "HI"]
+        assert calls == ["hi"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_error_propagates_and_clears(self):
+        calls: list[str] = []
+
+        @memoize_tool()
+        async def failing(text: str) -> str:
+            calls.append(text)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(failing(text="x"), failing(text="x"), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert calls == ["x"]
+
+        with pytest.raises(RuntimeError):
+            await failing(text="x")
+        assert calls == ["x", "x"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_first_caller_does_not_cancel_others(self):
+        calls: list[str] = []
+
+        @memoize_tool()
+        async def slow(text: str) -> str:
+            calls.append(text)
+            await asyncio.sleep(0.02)
+            return text.upper()
+
+        first = asyncio.create_task(slow(text="a"))
+        second = asyncio.create_task(slow(text="a"))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "A"
+        assert first.cancelled()
+        assert calls == ["a"]
+
+    def test_tool_schema_preserved(self):
+        schema = generate_content.parameters()
+        assert set(schema["properties"]) == {"topic", "platform", "strategy", "language"}
+        assert schema["required"] == ["topic", "platform"]